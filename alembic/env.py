@@ -6,8 +6,11 @@ from sqlalchemy import pool
 from alembic import context
 from models.base import Base
 from models.invoices_model import Invoice
+from models.invoice_line_items_model import InvoiceLineItem
 from models.students_model import Student
 from models.inserted_data_model import InsertedData
+from models.usage_daily_model import UsageDaily
+from models.jobs_model import Job
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
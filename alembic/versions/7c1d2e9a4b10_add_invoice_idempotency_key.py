@@ -0,0 +1,38 @@
+"""Add invoice idempotency key
+
+Revision ID: 7c1d2e9a4b10
+Revises: 
+Create Date: 2026-10-19 14:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1d2e9a4b10'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created by create_all after this change already have the column
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('fastapi_invoices')}
+    if 'idempotency_key' in columns:
+        return
+    op.add_column('fastapi_invoices', sa.Column('idempotency_key', sa.String(), nullable=True))
+    op.create_unique_constraint(
+        'fastapi_invoices_idempotency_key_key', 'fastapi_invoices', ['idempotency_key']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        'fastapi_invoices_idempotency_key_key', 'fastapi_invoices', type_='unique'
+    )
+    op.drop_column('fastapi_invoices', 'idempotency_key')
@@ -0,0 +1,123 @@
+"""Store usage in milli-credits and money in cents
+
+Revision ID: b4e8f1a27c35
+Revises: 7c1d2e9a4b10
+Create Date: 2026-10-19 15:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8f1a27c35'
+down_revision: Union[str, Sequence[str], None] = '7c1d2e9a4b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, old column, new column, new type, scale)
+CONVERTED_COLUMNS = [
+    ('fastapi_invoices', 'total', 'total_cents', 'bigint', 100),
+    ('fastapi_invoice_line_items', 'credit_price', 'credit_price_cents', 'integer', 100),
+    ('fastapi_invoice_line_items', 'used_credits', 'used_millicredits', 'bigint', 1000),
+    ('fastapi_invoice_line_items', 'amount', 'amount_cents', 'bigint', 100),
+    ('fastapi_usage_daily', 'credit_price', 'credit_price_cents', 'integer', 100),
+    ('fastapi_usage_daily', 'used_credits', 'used_millicredits', 'bigint', 1000),
+    ('fastapi_usage_daily', 'amount', 'amount_millicents', 'bigint', 100000),
+]
+
+
+def _columns(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return set()
+    return {c['name'] for c in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Only columns still in their float form are converted. Tables that do not
+    exist yet, such as line items and daily aggregates on a database from
+    before they were added, are created in fixed-point form by create_all at
+    startup.
+    """
+    if 'used_credits' in _columns('fastapi_inserted_data'):
+        _rewrite_inserted_data()
+
+    # The other tables are small, and their column order already avoids padding
+    for table, old, new, type_, scale in CONVERTED_COLUMNS:
+        if old not in _columns(table):
+            continue
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {old} TYPE {type_} "
+            f"USING ROUND({old}::numeric * {scale})::{type_}"
+        )
+        op.alter_column(table, old, new_column_name=new)
+
+
+def _rewrite_inserted_data():
+    # The raw usage table is rewritten rather than altered, to put the 8-byte
+    # timestamp first: (int4, timestamptz, float8, float8, int4) carried 4 bytes
+    # of alignment padding, (timestamptz, int4 x 4) carries none.
+    op.execute(
+        """
+        CREATE TABLE fastapi_inserted_data_new (
+            timestamp TIMESTAMPTZ,
+            id INTEGER NOT NULL DEFAULT nextval('fastapi_inserted_data_id_seq'),
+            student_id INTEGER,
+            used_millicredits INTEGER,
+            credit_price_cents INTEGER
+        )
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO fastapi_inserted_data_new
+            (timestamp, id, student_id, used_millicredits, credit_price_cents)
+        SELECT timestamp, id, student_id,
+               ROUND(used_credits::numeric * 1000)::integer,
+               ROUND(credit_price::numeric * 100)::integer
+        FROM fastapi_inserted_data
+        ORDER BY id
+        """
+    )
+    op.execute(
+        "ALTER SEQUENCE fastapi_inserted_data_id_seq OWNED BY fastapi_inserted_data_new.id"
+    )
+    op.drop_table('fastapi_inserted_data')
+    op.rename_table('fastapi_inserted_data_new', 'fastapi_inserted_data')
+    op.create_primary_key('fastapi_inserted_data_pkey', 'fastapi_inserted_data', ['id'])
+    op.create_index('ix_fastapi_inserted_data_id', 'fastapi_inserted_data', ['id'])
+    op.create_foreign_key(
+        'fastapi_inserted_data_student_id_fkey',
+        'fastapi_inserted_data',
+        'fastapi_students',
+        ['student_id'],
+        ['student_id'],
+        ondelete='CASCADE',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, old, new, type_, scale in reversed(CONVERTED_COLUMNS):
+        if new not in _columns(table):
+            continue
+        op.alter_column(table, new, new_column_name=old)
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {old} TYPE double precision "
+            f"USING {old}::double precision / {scale}"
+        )
+
+    # Column order is left as is; it does not matter for correctness
+    op.alter_column('fastapi_inserted_data', 'used_millicredits', new_column_name='used_credits')
+    op.alter_column('fastapi_inserted_data', 'credit_price_cents', new_column_name='credit_price')
+    for column, scale in (('used_credits', 1000), ('credit_price', 100)):
+        op.execute(
+            f"ALTER TABLE fastapi_inserted_data ALTER COLUMN {column} TYPE double precision "
+            f"USING {column}::double precision / {scale}"
+        )
@@ -0,0 +1,256 @@
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import psycopg2
+from psycopg2 import sql
+from dotenv import load_dotenv
+
+
+# --- CONFIG ---
+load_dotenv()
+ARCHIVE_DIR = os.getenv("USAGE_ARCHIVE_DIR", "archive")
+RETENTION_DAYS = int(os.getenv("USAGE_RETENTION_DAYS", "365"))
+BATCH_SIZE = 10000
+MANIFEST_NAME = "manifest.jsonl"
+COLUMNS = ["id", "timestamp", "used_millicredits", "credit_price_cents", "student_id"]
+
+GREEN = "\033[92m"
+YELLOW = "\033[93m"
+VIOLET = "\033[95m"
+RESET = "\033[0m"
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_archive(path, rows):
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def archive_usage(DATABASE_URL, older_than_days, archive_dir, batch_size):
+    """Moves already-invoiced raw usage rows older than the cutoff to csv.gz files.
+
+    Each batch is written to its own archive file, folded into
+    fastapi_usage_daily and deleted in one transaction, so the job can be
+    stopped at any point and resumed later.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    total_rows = 0
+
+    while True:
+        # 1. Pick the next batch of invoiced rows older than the cutoff
+        cur.execute(
+            """
+            SELECT d.id, d.timestamp, d.used_millicredits, d.credit_price_cents, d.student_id
+            FROM fastapi_inserted_data d
+            WHERE d.timestamp < %s
+              AND EXISTS (
+                SELECT 1 FROM fastapi_invoices i
+                WHERE i.student_id = d.student_id
+                  AND d.timestamp BETWEEN i.period_start AND i.period_end
+              )
+            ORDER BY d.id
+            LIMIT %s
+            FOR UPDATE OF d SKIP LOCKED;
+            """,
+            (cutoff, batch_size),
+        )
+        rows = cur.fetchall()
+        if not rows:
+            conn.rollback()
+            break
+
+        ids = [row[0] for row in rows]
+        filename = f"usage_{ids[0]}_{ids[-1]}.csv.gz"
+        path = os.path.join(archive_dir, filename)
+
+        # 2. Write the original rows before anything is deleted
+        _write_archive(path, rows)
+
+        try:
+            # 3. Fold the batch into the daily aggregates
+            cur.execute(
+                """
+                INSERT INTO fastapi_usage_daily
+                    (student_id, day, credit_price_cents, used_millicredits,
+                     amount_millicents, row_count)
+                SELECT student_id, timestamp::date, credit_price_cents,
+                       SUM(used_millicredits),
+                       SUM(used_millicredits::bigint * credit_price_cents), COUNT(*)
+                FROM fastapi_inserted_data
+                WHERE id = ANY(%s)
+                GROUP BY student_id, timestamp::date, credit_price_cents
+                ON CONFLICT (student_id, day, credit_price_cents) DO UPDATE SET
+                    used_millicredits =
+                        fastapi_usage_daily.used_millicredits + EXCLUDED.used_millicredits,
+                    amount_millicents =
+                        fastapi_usage_daily.amount_millicents + EXCLUDED.amount_millicents,
+                    row_count = fastapi_usage_daily.row_count + EXCLUDED.row_count;
+                """,
+                (ids,),
+            )
+
+            # 4. Delete the archived raw rows
+            cur.execute("DELETE FROM fastapi_inserted_data WHERE id = ANY(%s);", (ids,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            os.remove(path)
+            raise
+
+        # 5. Record the file in the manifest only once the batch is committed
+        entry = {
+            "file": filename,
+            "rows": len(rows),
+            "first_id": ids[0],
+            "last_id": ids[-1],
+            "min_timestamp": min(row[1] for row in rows).isoformat(),
+            "max_timestamp": max(row[1] for row in rows).isoformat(),
+            "sha256": _sha256(path),
+            "archived_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with open(os.path.join(archive_dir, MANIFEST_NAME), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+        total_rows += len(rows)
+        print(f"{VIOLET}📦 Archived {len(rows)} rows to '{filename}'{RESET}")
+
+    cur.close()
+    conn.close()
+    return total_rows
+
+
+def restore_archive(DATABASE_URL, path, table):
+    """Loads an archive file back into `table` (created if missing) for audits."""
+    manifest_path = os.path.join(os.path.dirname(path), MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        entry = next((e for e in entries if e["file"] == os.path.basename(path)), None)
+        if entry and entry["sha256"] != _sha256(path):
+            raise ValueError(f"Checksum mismatch for {path}")
+
+    if table == "fastapi_inserted_data":
+        print(
+            f"{YELLOW}⚠️  Restored rows are also counted in fastapi_usage_daily; "
+            f"archiving them again would count them twice{RESET}"
+        )
+
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    cur.execute(
+        sql.SQL(
+            """
+            CREATE TABLE IF NOT EXISTS {} (
+                id INTEGER PRIMARY KEY,
+                timestamp TIMESTAMPTZ,
+                used_millicredits INTEGER,
+                credit_price_cents INTEGER,
+                student_id INTEGER
+            );
+            """
+        ).format(sql.Identifier(table))
+    )
+    cur.execute(
+        "CREATE TEMP TABLE fastapi_tmp_restore (LIKE fastapi_inserted_data) ON COMMIT DROP;"
+    )
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        cur.copy_expert(
+            "COPY fastapi_tmp_restore(id, timestamp, used_millicredits, credit_price_cents, student_id) "
+            "FROM STDIN WITH (FORMAT csv, HEADER true)",
+            f,
+        )
+    cur.execute(
+        sql.SQL(
+            """
+            INSERT INTO {} (id, timestamp, used_millicredits, credit_price_cents, student_id)
+            SELECT id, timestamp, used_millicredits, credit_price_cents, student_id
+            FROM fastapi_tmp_restore
+            ON CONFLICT (id) DO NOTHING;
+            """
+        ).format(sql.Identifier(table))
+    )
+    row_count = cur.rowcount
+    conn.commit()
+    cur.close()
+    conn.close()
+    return row_count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Archive invoiced usage rows or restore an archive"
+    )
+    parser.add_argument(
+        "--env", choices=["dev", "prod"], required=True, help="Which environment to use"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = subparsers.add_parser("archive", help="Archive old invoiced rows")
+    # Defaults come from the --env file, which is only loaded after parsing
+    archive_parser.add_argument(
+        "--older-than-days", type=int, help="Default: USAGE_RETENTION_DAYS or 365"
+    )
+    archive_parser.add_argument(
+        "--archive-dir", help="Default: USAGE_ARCHIVE_DIR or archive"
+    )
+    archive_parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    restore_parser = subparsers.add_parser("restore", help="Reload an archive file")
+    restore_parser.add_argument("file", help="Path to a usage_*.csv.gz archive")
+    restore_parser.add_argument(
+        "--table",
+        default="fastapi_inserted_data_restored",
+        help="Target table, created if it does not exist",
+    )
+    args = parser.parse_args()
+
+    env_file = ".env.dev" if args.env == "dev" else ".env.prod"
+    if not os.path.exists(env_file):
+        print(f"{YELLOW}❌ Environment file '{env_file}' not found.{RESET}")
+        return
+    load_dotenv(dotenv_path=env_file)
+
+    DATABASE_URL = os.getenv("DATABASE_URL")
+    if not DATABASE_URL:
+        print(f"{YELLOW}❌ DATABASE_URL not found in {env_file}{RESET}")
+        return
+
+    if args.command == "archive":
+        older_than_days = args.older_than_days
+        if older_than_days is None:
+            older_than_days = int(os.getenv("USAGE_RETENTION_DAYS", RETENTION_DAYS))
+        archive_dir = args.archive_dir or os.getenv("USAGE_ARCHIVE_DIR", ARCHIVE_DIR)
+        total_rows = archive_usage(
+            DATABASE_URL, older_than_days, archive_dir, args.batch_size
+        )
+        print(f"{GREEN}✅ Archived {total_rows} rows in total{RESET}")
+    else:
+        row_count = restore_archive(DATABASE_URL, args.file, args.table)
+        print(f"{GREEN}✅ Restored {row_count} rows into {args.table}{RESET}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print("ERROR:", e)
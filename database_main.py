@@ -1,4 +1,5 @@
 import os
+from contextvars import ContextVar
 from dotenv import load_dotenv
 from sqlalchemy import (
     create_engine,
@@ -9,7 +10,7 @@ from sqlalchemy import (
     TIMESTAMP,
     Identity,
 )
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 import models
 from models.base import Base
 from models import invoices_model, students_model
@@ -20,6 +21,32 @@ print("Connecting to DATABASE_URL:", DATABASE_URL)
 print("Connecting to os.getenv(:", os.getenv("DATABASE_URL"))
 
 engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Optional read-only replica. Without it every session uses the primary.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+read_engine = create_engine(READ_DATABASE_URL) if READ_DATABASE_URL else None
+# After a write, the same browser reads from the primary for this many seconds
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def route_reads_to_replica(enabled):
+    """Sets whether sessions in the current context may read from the replica."""
+    return _use_replica.set(enabled)
+
+
+def reset_read_routing(token):
+    _use_replica.reset(token)
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if read_engine is not None and _use_replica.get() and not self._flushing:
+            return read_engine
+        return engine
+
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 Base = declarative_base()
 Base.metadata.create_all(bind=engine)
@@ -75,42 +75,70 @@ def import_csv_to_db(csv_path, student_id, DATABASE_URL):
     cur.execute("SELECT COUNT(*) FROM fastapi_tmp_import;")
     row_count = cur.fetchone()[0]
 
-    # 4. Insert into main table with fixed student_id
+    # 4. Insert into main table with fixed student_id, as milli-credits and cents
     cur.execute(
         """
-        INSERT INTO fastapi_inserted_data (timestamp, used_credits, credit_price, student_id)
+        INSERT INTO fastapi_inserted_data (timestamp, used_millicredits, credit_price_cents, student_id)
         SELECT
             timestamp::timestamptz,
-            REPLACE(used_credits, ',', '.')::double precision,
-            REPLACE(credit_price, ',', '.')::double precision,
+            ROUND(REPLACE(used_credits, ',', '.')::numeric * 1000)::integer,
+            ROUND(REPLACE(credit_price, ',', '.')::numeric * 100)::integer,
             %s
         FROM fastapi_tmp_import;
     """,
         (student_id,),
     )
 
-        # Compute period_start, period_end, and total
+        # Compute period_start and period_end
     cur.execute(
         """
-        SELECT MIN(timestamp), MAX(timestamp), SUM(used_credits * credit_price)
+        SELECT MIN(timestamp), MAX(timestamp)
         FROM fastapi_inserted_data
         WHERE student_id = %s;
         """,
         (student_id,),
     )
-    period_start, period_end, total = cur.fetchone()
+    period_start, period_end = cur.fetchone()
 
-    # 6. Insert into invoices table
+    # 6. Insert into invoices table, the total is filled in from the line items
     cur.execute(
         """
-        INSERT INTO fastapi_invoices (student_id, period_start, period_end, total)
-        VALUES (%s, %s, %s, %s)
+        INSERT INTO fastapi_invoices (student_id, period_start, period_end, total_cents)
+        VALUES (%s, %s, %s, 0)
         RETURNING id;
         """,
-        (student_id, period_start, period_end, total),
+        (student_id, period_start, period_end),
     )
     invoice_id = cur.fetchone()[0]
 
+    # 7. Store one line item per credit price, so invoice views never re-aggregate.
+    #    Cost is exact in milli-cents (bigint, so the product cannot overflow)
+    #    and rounded to cents once per line item.
+    cur.execute(
+        """
+        INSERT INTO fastapi_invoice_line_items
+            (invoice_id, credit_price_cents, used_millicredits, amount_cents)
+        SELECT %s, credit_price_cents, SUM(used_millicredits),
+               ROUND(SUM(used_millicredits::bigint * credit_price_cents) / 1000.0)
+        FROM fastapi_inserted_data
+        WHERE student_id = %s
+        GROUP BY credit_price_cents;
+        """,
+        (invoice_id, student_id),
+    )
+    cur.execute(
+        """
+        UPDATE fastapi_invoices
+        SET total_cents = (
+            SELECT COALESCE(SUM(amount_cents), 0)
+            FROM fastapi_invoice_line_items
+            WHERE invoice_id = %s
+        )
+        WHERE id = %s;
+        """,
+        (invoice_id, invoice_id),
+    )
+
     conn.commit()
     cur.close()
     conn.close()
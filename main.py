@@ -1,10 +1,10 @@
 from fastapi import FastAPI, Depends, Form, HTTPException, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from auth.dependencies import require_login
+import database_main
 from database_main import SessionLocal
 from models import invoices_model, students_model
 from models.students_model import Student
@@ -12,7 +12,18 @@ from models.invoices_model import Invoice
 from routers.invoices_router import router as invoices_router
 from routers.students_router import router as students_router
 from routers.add_student_router import router as add_student_router
-from auth.session import login_user, logout_user, VALID_USERNAME, VALID_PASSWORD
+from routers.export_router import router as export_router
+from routers.jobs_router import router as jobs_router
+from auth.session import (
+    get_logged_in_user,
+    login_user,
+    logout_user,
+    VALID_USERNAME,
+    VALID_PASSWORD,
+)
+import profiling
+from templating import stream_template, templates
+import time
 import urllib.parse
 
 
@@ -20,9 +31,9 @@ app = FastAPI()
 app.include_router(invoices_router)
 app.include_router(add_student_router)
 app.include_router(students_router)
+app.include_router(export_router)
+app.include_router(jobs_router)
 app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
-
 
 @app.on_event("startup")
 def startup():
@@ -45,6 +56,77 @@ async def redirect_unauthenticated(request: Request, call_next):
         raise e
 
 
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    wants_profile = (
+        request.query_params.get(profiling.PROFILE_QUERY_PARAM) == "1"
+        or request.headers.get(profiling.PROFILE_HEADER) == "1"
+    ) and get_logged_in_user(request) == VALID_USERNAME
+
+    collector, token = profiling.start_collecting()
+    sampler = profiling.StackSampler()
+    if wants_profile:
+        sampler.start()
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+        if wants_profile:
+            # Drain the body so template rendering is part of the profile
+            async for _ in response.body_iterator:
+                pass
+    finally:
+        elapsed = time.perf_counter() - started
+        profiling.stop_collecting(token)
+        if wants_profile:
+            sampler.stop()
+
+    path = profiling.route_path(request)
+    if not wants_profile:
+        # Streamed pages keep querying while the body is sent, so check afterwards
+        response.body_iterator = profiling.check_query_budget_after(
+            response.body_iterator, path, collector
+        )
+        return response
+
+    profiling.check_query_budget(path, collector)
+
+    report = profiling.build_report(request, collector, sampler, elapsed)
+    filename = f"profile_{int(time.time())}.txt"
+    return Response(
+        report,
+        media_type="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.middleware("http")
+async def read_routing_middleware(request: Request, call_next):
+    read_only = request.method in ("GET", "HEAD") and not _wrote_recently(request)
+    token = database_main.route_reads_to_replica(read_only)
+    try:
+        response = await call_next(request)
+    finally:
+        database_main.reset_read_routing(token)
+
+    if database_main.read_engine is not None and request.method not in (
+        "GET",
+        "HEAD",
+        "OPTIONS",
+    ):
+        window = database_main.READ_YOUR_WRITES_SECONDS
+        response.set_cookie(
+            key="wrote_until", value=str(time.time() + window), max_age=window, httponly=True
+        )
+    return response
+
+
+def _wrote_recently(request: Request):
+    try:
+        return float(request.cookies.get("wrote_until", 0)) > time.time()
+    except ValueError:
+        return False
+
+
 @app.middleware("http")
 async def flash_middleware(request: Request, call_next):
     response = await call_next(request)
@@ -112,20 +194,19 @@ def show_add_student(request: Request):
 @app.get("/manage_students", response_class=HTMLResponse)
 def manage_students(request: Request):
     db = SessionLocal()
-    students = db.query(Student).all()
-    db.close()
-    return templates.TemplateResponse(
-        "manage_students.html", {"request": request, "students": students}
+    students = db.query(Student).order_by(Student.student_id).yield_per(500)
+    return stream_template(
+        request, "manage_students.html", {"students": students}, db=db
     )
 
 
 @app.get("/manage_invoices", response_class=HTMLResponse)
-def manage_invoices(
-    request: Request, db: Session = Depends(get_db), user: str = Depends(require_login)
-):
-    invoices = db.query(Invoice).all()
-    return templates.TemplateResponse(
-        "manage_invoices.html", {"request": request, "invoices": invoices}
+def manage_invoices(request: Request, user: str = Depends(require_login)):
+    # Not Depends(get_db): the session must outlive the endpoint while streaming
+    db = SessionLocal()
+    invoices = db.query(Invoice).order_by(Invoice.id).yield_per(500)
+    return stream_template(
+        request, "manage_invoices.html", {"invoices": invoices}, db=db
     )
 
 
@@ -0,0 +1,103 @@
+import argparse
+import os
+import time
+
+import psycopg2
+from dotenv import load_dotenv
+
+
+TABLES = [
+    "fastapi_inserted_data",
+    "fastapi_invoices",
+    "fastapi_invoice_line_items",
+    "fastapi_usage_daily",
+]
+
+# The cost expression before and after the fixed-point migration
+FLOAT_COST = "SUM(used_credits * credit_price)"
+FIXED_POINT_COST = "SUM(used_millicredits::bigint * credit_price_cents)"
+
+GREEN = "\033[92m"
+YELLOW = "\033[93m"
+RESET = "\033[0m"
+
+
+def measure(DATABASE_URL, runs):
+    """Prints table/index sizes and times the per-student cost aggregate.
+
+    Run it before and after `alembic upgrade head` to compare the storage
+    layouts on the same data.
+    """
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    print(f"{'table':<30} {'rows':>12} {'heap':>10} {'indexes':>10} {'total':>10} {'avg row':>8}")
+    for table in TABLES:
+        cur.execute("SELECT to_regclass(%s);", (table,))
+        if cur.fetchone()[0] is None:
+            continue
+        cur.execute(
+            f"""
+            SELECT COUNT(*),
+                   pg_size_pretty(pg_relation_size(%s)),
+                   pg_size_pretty(pg_indexes_size(%s)),
+                   pg_size_pretty(pg_total_relation_size(%s)),
+                   COALESCE(AVG(pg_column_size(t.*)), 0)::integer
+            FROM {table} t;
+            """,
+            (table, table, table),
+        )
+        rows, heap, indexes, total, avg_row = cur.fetchone()
+        print(f"{table:<30} {rows:>12} {heap:>10} {indexes:>10} {total:>10} {avg_row:>8}")
+
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_name = 'fastapi_inserted_data' AND column_name = 'used_millicredits';
+        """
+    )
+    cost = FIXED_POINT_COST if cur.fetchone()[0] else FLOAT_COST
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        cur.execute(f"SELECT student_id, {cost} FROM fastapi_inserted_data GROUP BY student_id;")
+        cur.fetchall()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(
+        f"{GREEN}⏱️  {cost}: best {timings[0] * 1000:.1f} ms, "
+        f"median {timings[len(timings) // 2] * 1000:.1f} ms over {runs} runs{RESET}"
+    )
+
+    cur.close()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure storage size and scan speed")
+    parser.add_argument(
+        "--env", choices=["dev", "prod"], required=True, help="Which environment to use"
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Aggregate scans to time")
+    args = parser.parse_args()
+
+    env_file = ".env.dev" if args.env == "dev" else ".env.prod"
+    if not os.path.exists(env_file):
+        print(f"{YELLOW}❌ Environment file '{env_file}' not found.{RESET}")
+        return
+    load_dotenv(dotenv_path=env_file)
+
+    DATABASE_URL = os.getenv("DATABASE_URL")
+    if not DATABASE_URL:
+        print(f"{YELLOW}❌ DATABASE_URL not found in {env_file}{RESET}")
+        return
+
+    measure(DATABASE_URL, args.runs)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print("ERROR:", e)
@@ -1,2 +1,5 @@
 # models/__init__.py
 from .invoices_model import Invoice
+from .invoice_line_items_model import InvoiceLineItem
+from .usage_daily_model import UsageDaily
+from .jobs_model import Job
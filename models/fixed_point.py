@@ -0,0 +1,30 @@
+"""Conversions between the stored integer units and human-readable values.
+
+Usage is stored in milli-credits and prices and amounts in cents, so sums
+are exact integer arithmetic. The cost of a usage row is
+used_millicredits * credit_price_cents, which is in milli-cents.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+MILLI = 1000
+CENTS = 100
+
+
+def credits_to_milli(value):
+    return int((Decimal(str(value)) * MILLI).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def price_to_cents(value):
+    return int((Decimal(str(value)) * CENTS).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def millicents_to_cents(value):
+    return int((Decimal(value) / MILLI).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def milli_to_credits(value):
+    return Decimal(value) / MILLI
+
+
+def cents_to_decimal(value):
+    return Decimal(value) / CENTS
@@ -1,8 +1,8 @@
 from models.base import Base
+from models.fixed_point import cents_to_decimal, milli_to_credits
 from sqlalchemy import (
     Column,
     Integer,
-    Float,
     TIMESTAMP,
     ForeignKey,
 )
@@ -11,10 +11,19 @@ from sqlalchemy import (
 class InsertedData(Base):
     __tablename__ = "fastapi_inserted_data"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # 8-byte column first, then the 4-byte ones, so rows carry no alignment padding
     timestamp = Column(TIMESTAMP(timezone=True))
-    used_credits = Column(Float)
-    credit_price = Column(Float)
+    id = Column(Integer, primary_key=True, index=True)
     student_id = Column(
         Integer, ForeignKey("fastapi_students.student_id", ondelete="CASCADE")
     )
+    used_millicredits = Column(Integer)
+    credit_price_cents = Column(Integer)
+
+    @property
+    def used_credits(self):
+        return milli_to_credits(self.used_millicredits)
+
+    @property
+    def credit_price(self):
+        return cents_to_decimal(self.credit_price_cents)
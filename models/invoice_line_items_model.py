@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey, Date
+from models.base import Base
+from models.fixed_point import cents_to_decimal, milli_to_credits
+
+
+class InvoiceLineItem(Base):
+    __tablename__ = "fastapi_invoice_line_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    invoice_id = Column(
+        Integer,
+        ForeignKey("fastapi_invoices.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    # Set only when the invoice was grouped by day as well as by price
+    day = Column(Date, nullable=True)
+    credit_price_cents = Column(Integer, nullable=False)
+    used_millicredits = Column(BigInteger, nullable=False)
+    amount_cents = Column(BigInteger, nullable=False)
+
+    @property
+    def credit_price(self):
+        return cents_to_decimal(self.credit_price_cents)
+
+    @property
+    def used_credits(self):
+        return milli_to_credits(self.used_millicredits)
+
+    @property
+    def amount(self):
+        return cents_to_decimal(self.amount_cents)
@@ -1,5 +1,7 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey, DateTime, String
+from sqlalchemy.orm import relationship
 from models.base import Base
+from models.fixed_point import cents_to_decimal
 
 
 class Invoice(Base):
@@ -13,4 +15,17 @@ class Invoice(Base):
     )
     period_start = Column(DateTime, nullable=True)
     period_end = Column(DateTime, nullable=True)
-    total = Column(Float, nullable=False)
+    total_cents = Column(BigInteger, nullable=False)
+    # Sent by the create invoice form so a double submit creates one invoice
+    idempotency_key = Column(String, nullable=True, unique=True)
+
+    line_items = relationship(
+        "InvoiceLineItem",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="[InvoiceLineItem.day, InvoiceLineItem.credit_price_cents]",
+    )
+
+    @property
+    def total(self):
+        return cents_to_decimal(self.total_cents)
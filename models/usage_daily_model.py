@@ -0,0 +1,27 @@
+from models.base import Base
+from sqlalchemy import (
+    Column,
+    Integer,
+    BigInteger,
+    Date,
+    ForeignKey,
+    UniqueConstraint,
+)
+
+
+class UsageDaily(Base):
+    """Daily aggregates of raw usage rows that were archived by the retention job."""
+
+    __tablename__ = "fastapi_usage_daily"
+    __table_args__ = (UniqueConstraint("student_id", "day", "credit_price_cents"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(
+        Integer, ForeignKey("fastapi_students.student_id", ondelete="CASCADE")
+    )
+    day = Column(Date, nullable=False)
+    credit_price_cents = Column(Integer, nullable=False)
+    used_millicredits = Column(BigInteger, nullable=False)
+    # Kept unrounded; amounts are only rounded to cents when invoiced
+    amount_millicents = Column(BigInteger, nullable=False)
+    row_count = Column(Integer, nullable=False)
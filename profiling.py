@@ -0,0 +1,173 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Requests are profiled when an admin sends ?profile=1 or the X-Profile: 1 header.
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_HEADER = "X-Profile"
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+# Query budgets per route path, e.g.
+# QUERY_BUDGETS="/manage_invoices=3,/invoices/{invoice_id}/view_invoice=4"
+DEFAULT_QUERY_BUDGET = int(os.getenv("DEFAULT_QUERY_BUDGET", "20"))
+# The same statement repeated this many times in one request is reported as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+
+def _parse_query_budgets(value):
+    budgets = {}
+    for item in (value or "").split(","):
+        if "=" not in item:
+            continue
+        path, budget = item.rsplit("=", 1)
+        budgets[path.strip()] = int(budget)
+    return budgets
+
+
+QUERY_BUDGETS = _parse_query_budgets(os.getenv("QUERY_BUDGETS"))
+
+_current_collector = ContextVar("query_collector", default=None)
+
+
+class QueryCollector:
+    """Collects every SQL statement executed while handling one request."""
+
+    def __init__(self):
+        self.queries = []
+
+    @property
+    def total_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def repeated_statements(self, threshold=N_PLUS_ONE_THRESHOLD):
+        counts = Counter(statement for statement, _ in self.queries)
+        return [(stmt, count) for stmt, count in counts.most_common() if count >= threshold]
+
+
+# Listening on the Engine class covers every engine the app creates
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_collector.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collector = _current_collector.get()
+    starts = conn.info.get("query_start")
+    if collector is None or not starts:
+        return
+    collector.queries.append((statement, time.perf_counter() - starts.pop()))
+
+
+def start_collecting():
+    collector = QueryCollector()
+    token = _current_collector.set(collector)
+    return collector, token
+
+
+def stop_collecting(token):
+    _current_collector.reset(token)
+
+
+class StackSampler:
+    """Samples the call stacks of all other threads at a fixed interval.
+
+    Sync endpoints run in the threadpool, so the sampler cannot know which
+    thread serves the profiled request; concurrent requests show up too.
+    """
+
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                # Skip idle threads waiting on the event loop or the threadpool queue
+                if stack and stack[0].startswith(("select ", "wait ")):
+                    continue
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+def route_path(request):
+    """Returns the path template of the route that handled the request."""
+    from starlette.routing import Match
+
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return request.url.path
+
+
+def check_query_budget(path, collector):
+    budget = QUERY_BUDGETS.get(path, DEFAULT_QUERY_BUDGET)
+    count = len(collector.queries)
+    if count > budget:
+        print(f"⚠️  Query budget exceeded on {path}: {count} queries (budget {budget})")
+    for statement, repeats in collector.repeated_statements():
+        print(f"⚠️  Possible N+1 on {path}: {repeats}x {' '.join(statement.split())}")
+
+
+async def check_query_budget_after(body_iterator, path, collector):
+    """Passes the body through, checking the budget once it has been sent."""
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    finally:
+        check_query_budget(path, collector)
+
+
+def build_report(request, collector, sampler, elapsed):
+    lines = [
+        f"Profile for {request.method} {request.url.path}",
+        f"Wall time: {elapsed * 1000:.1f} ms",
+        f"SQL: {len(collector.queries)} statements, {collector.total_time * 1000:.1f} ms",
+        f"Stack samples: {sampler.samples} every {sampler.interval * 1000:.1f} ms",
+        "",
+        "== SQL statements ==",
+    ]
+    for i, (statement, duration) in enumerate(collector.queries, start=1):
+        lines.append(f"#{i} {duration * 1000:.2f} ms")
+        lines.append(statement.strip())
+        lines.append("")
+
+    repeated = collector.repeated_statements()
+    if repeated:
+        lines.append("== Repeated statements (possible N+1) ==")
+        for statement, repeats in repeated:
+            lines.append(f"{repeats}x {' '.join(statement.split())}")
+        lines.append("")
+
+    # Collapsed stacks, usable as input for flamegraph.pl / speedscope
+    lines.append("== Sampled stacks ==")
+    for stack, count in sampler.stacks.most_common():
+        lines.append(f"{stack} {count}")
+    return "\n".join(lines) + "\n"
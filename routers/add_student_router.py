@@ -1,17 +1,15 @@
 from fastapi import APIRouter, Depends, Form, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 
 from sqlalchemy.orm import Session
 
 from auth.dependencies import require_login
 from database_main import SessionLocal
 from models.students_model import Student
+from templating import stream_template, templates
 
 
 router = APIRouter(dependencies=[Depends(require_login)])
-templates = Jinja2Templates(directory="templates")
-
 
 def get_db():
     db = SessionLocal()
@@ -54,8 +52,7 @@ def handle_add_student(
 @router.get("/manage_students", response_class=HTMLResponse)
 def manage_students(request: Request):
     db = SessionLocal()
-    students = db.query(Student).all()
-    db.close()
-    return templates.TemplateResponse(
-        "manage_students.html", {"request": request, "students": students}
+    students = db.query(Student).order_by(Student.student_id).yield_per(500)
+    return stream_template(
+        request, "manage_students.html", {"students": students}, db=db
     )
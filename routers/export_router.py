@@ -0,0 +1,149 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Numeric, cast, select
+
+from auth.dependencies import require_login
+from database_main import SessionLocal
+from models.fixed_point import CENTS, MILLI
+from models.inserted_data_model import InsertedData
+from models.invoices_model import Invoice
+
+
+router = APIRouter(
+    prefix="/export", tags=["Export"], dependencies=[Depends(require_login)]
+)
+
+# Rows fetched per round trip from the server-side cursor, and per response chunk
+EXPORT_BATCH_SIZE = 5000
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _encode_csv(columns, rows, with_header):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if with_header:
+        writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _json_default(value):
+    # Decimal amounts stay JSON numbers; the shortest float repr keeps their digits
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _encode_ndjson(columns, rows, with_header):
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_default) + "\n"
+        for row in rows
+    )
+
+
+def _decimal(column, scale, places, name):
+    """Exports an integer unit column as the decimal value it stands for."""
+    return cast(cast(column, Numeric) / scale, Numeric(18, places)).label(name)
+
+
+def _stream_rows(statement, fmt, compress):
+    """Yields encoded chunks of the statement's rows.
+
+    The session is opened here rather than through a dependency because the
+    body is sent after the endpoint returns. yield_per makes psycopg2 use a
+    named (server-side) cursor, so only one batch is held in memory.
+    """
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31 = gzip
+
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        columns = list(result.keys())
+        with_header = True
+        for rows in result.partitions():
+            chunk = encode(columns, rows, with_header).encode("utf-8")
+            with_header = False
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        if with_header and fmt == "csv":
+            # No rows at all: still send the header line
+            chunk = encode(columns, [], True).encode("utf-8")
+            yield compressor.compress(chunk) if compressor else chunk
+        if compressor:
+            yield compressor.flush()
+    finally:
+        db.close()
+
+
+def _export_response(statement, name, fmt, compress):
+    filename = f"{name}.{fmt}" + (".gz" if compress else "")
+    media_type = "application/gzip" if compress else MEDIA_TYPES[fmt]
+    return StreamingResponse(
+        _stream_rows(statement, fmt, compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/usage")
+def export_usage(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    student_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    gzip: bool = False,
+):
+    # Same columns and units as before usage was stored in fixed point
+    statement = select(
+        InsertedData.id,
+        InsertedData.timestamp,
+        _decimal(InsertedData.used_millicredits, MILLI, 3, "used_credits"),
+        _decimal(InsertedData.credit_price_cents, CENTS, 2, "credit_price"),
+        InsertedData.student_id,
+    ).order_by(InsertedData.id)
+    if student_id is not None:
+        statement = statement.where(InsertedData.student_id == student_id)
+    if start is not None:
+        statement = statement.where(InsertedData.timestamp >= start)
+    if end is not None:
+        statement = statement.where(InsertedData.timestamp < end)
+    return _export_response(statement, "usage", fmt, gzip)
+
+
+@router.get("/invoices")
+def export_invoices(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    student_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    gzip: bool = False,
+):
+    statement = select(
+        Invoice.id,
+        Invoice.student_id,
+        Invoice.period_start,
+        Invoice.period_end,
+        _decimal(Invoice.total_cents, CENTS, 2, "total"),
+        Invoice.idempotency_key,
+    ).order_by(Invoice.id)
+    if student_id is not None:
+        statement = statement.where(Invoice.student_id == student_id)
+    if start is not None:
+        statement = statement.where(Invoice.period_start >= start)
+    if end is not None:
+        statement = statement.where(Invoice.period_end < end)
+    return _export_response(statement, "invoices", fmt, gzip)
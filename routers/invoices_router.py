@@ -1,26 +1,34 @@
-import tempfile
+import os
+import uuid
+from typing import Optional
 
 from fastapi import APIRouter, Depends, Form, HTTPException, Request
-from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 
 from sqlalchemy.orm import Session
 
-from weasyprint import HTML
-
 from auth.dependencies import require_login
 from database_main import SessionLocal
+from models.fixed_point import price_to_cents
 from models.invoices_model import Invoice
 from models.students_model import Student
-from models.inserted_data_model import InsertedData
 from schemas.invoice_schema import InvoiceCreate, InvoiceOut
+from services.invoice_service import (
+    IdempotencyKeyConflict,
+    create_invoice_for_student,
+    invoice_pdf_path,
+    render_invoice_pdf,
+)
+from singleflight import SingleFlight
+from templating import templates
 
 
 router = APIRouter(
     prefix="/invoices", tags=["Invoices"], dependencies=[Depends(require_login)]
 )
 
-templates = Jinja2Templates(directory="templates")
+# Concurrent identical requests in this process share one computation
+invoice_flight = SingleFlight()
 
 
 def get_db():
@@ -34,7 +42,9 @@ def get_db():
 # Create
 @router.post("/", response_model=InvoiceOut)
 def create_invoice(invoice: InvoiceCreate, db: Session = Depends(get_db)):
-    new_invoice = Invoice(**invoice.dict())
+    new_invoice = Invoice(
+        student_id=invoice.student_id, total_cents=price_to_cents(invoice.total)
+    )
     db.add(new_invoice)
     db.commit()
     db.refresh(new_invoice)
@@ -60,41 +70,41 @@ def search_student(request: Request, search_name: str, db: Session = Depends(get
 
     return templates.TemplateResponse(
         "create_invoice.html",  # or whatever your template is called
-        {"request": request, "search_results": results},
+        {
+            "request": request,
+            "search_results": results,
+            "idempotency_key": uuid.uuid4().hex,
+        },
     )
 
 
 @router.post("/create_invoice", response_class=HTMLResponse)
 def handle_form(
-    request: Request, student_id: int = Form(...), db: Session = Depends(get_db)
+    request: Request,
+    student_id: int = Form(...),
+    by_day: bool = Form(False),
+    idempotency_key: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
 ):
-    rows = db.query(InsertedData).filter(InsertedData.student_id == student_id).all()
+    def create():
+        invoice = create_invoice_for_student(
+            db, student_id, by_day=by_day, idempotency_key=idempotency_key
+        )
+        return None if invoice is None else invoice.total
 
-    if not rows:
+    # The student is part of the key, so a reused key never shares another student's result
+    key = f"create-invoice:{student_id}:{idempotency_key or by_day}"
+    try:
+        total = invoice_flight.do(key, create)
+    except IdempotencyKeyConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if total is None:
         result = {"message": f"No data found for student_id {student_id}"}
         return templates.TemplateResponse(
             "create_invoice.html", {"request": request, "result": result}
         )
 
-    total = 0
-    invalid_found = False
-
-    for row in rows:
-        try:
-            poraba = float(row.poraba)
-            cena = float(row.dinamicne_cene)
-            total += poraba * cena
-        except (ValueError, TypeError):
-            invalid_found = True
-
-    if invalid_found:
-        print("❌ At least one row has invalid data format.")
-
-    new_invoice = Invoice(student_id=student_id, total=total)
-    db.add(new_invoice)
-    db.commit()
-    db.refresh(new_invoice)
-
     result = {
         "message": "Invoice ustvarjen uspešno",
         "student_id": student_id,
@@ -134,6 +144,8 @@ def delete_invoice_web(invoice_id: int, db: Session = Depends(get_db)):
     if invoice:
         db.delete(invoice)
         db.commit()
+        if os.path.exists(invoice_pdf_path(invoice_id)):
+            os.remove(invoice_pdf_path(invoice_id))
     return RedirectResponse(url="/manage_invoices", status_code=303)
 
 
@@ -143,17 +155,14 @@ def export_invoice_pdf(invoice_id: int, db: Session = Depends(get_db)):
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
 
-    student = db.query(Student).filter_by(student_id=invoice.student_id).first()
-
-    # Render the PDF-specific template (no url_for)
-    html_content = templates.get_template("view_invoice_pdf.html").render(
-        invoice=invoice, student=student
+    # Concurrent downloads share the render in flight; nothing is kept afterwards
+    pdf = invoice_flight.do(
+        f"invoice-pdf:{invoice_id}", lambda: render_invoice_pdf(db, invoice)
     )
 
-    # Generate PDF
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-        HTML(string=html_content, base_url=".").write_pdf(tmp_file.name)
-        pdf_path = tmp_file.name
-
     filename = f"invoice_{invoice.id}.pdf"
-    return FileResponse(pdf_path, media_type="application/pdf", filename=filename)
+    return Response(
+        pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
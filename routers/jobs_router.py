@@ -0,0 +1,48 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from auth.dependencies import require_login
+from database_main import SessionLocal
+from models.jobs_model import Job
+from schemas.job_schema import JobCreate, JobOut
+from services.job_queue import JOB_KINDS, enqueue
+
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"], dependencies=[Depends(require_login)])
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@router.post("/", response_model=JobOut)
+def create_job(job: JobCreate, db: Session = Depends(get_db)):
+    if job.kind not in JOB_KINDS:
+        raise HTTPException(
+            status_code=422, detail=f"kind must be one of {', '.join(JOB_KINDS)}"
+        )
+    return enqueue(db, job.kind, job.payload, job.priority, job.max_attempts)
+
+
+@router.get("/", response_model=list[JobOut])
+def read_jobs(
+    status: Optional[str] = None, limit: int = 100, db: Session = Depends(get_db)
+):
+    query = db.query(Job)
+    if status:
+        query = query.filter(Job.status == status)
+    return query.order_by(Job.id.desc()).limit(limit).all()
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def read_job(job_id: int, db: Session = Depends(get_db)):
+    job = db.query(Job).get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,14 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Form
 from fastapi.responses import RedirectResponse, HTMLResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
 from auth.dependencies import require_login
 from database_main import SessionLocal
 from models.students_model import Student
 from schemas.students_schema import StudentCreate, StudentOut, StudentUpdate
-
-templates = Jinja2Templates(directory="templates")
+from templating import templates
 
 router = APIRouter(
     prefix="/students", tags=["Students"], dependencies=[Depends(require_login)]
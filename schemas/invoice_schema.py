@@ -1,9 +1,11 @@
+from decimal import Decimal
+
 from pydantic import BaseModel
 
 
 class InvoiceCreate(BaseModel):
     student_id: int
-    total: float
+    total: Decimal
 
 
 class InvoiceOut(BaseModel):
@@ -0,0 +1,141 @@
+import os
+import tempfile
+
+from sqlalchemy import BigInteger, Date, cast, func
+from sqlalchemy.exc import IntegrityError
+from weasyprint import HTML
+
+from models.inserted_data_model import InsertedData
+from models.invoice_line_items_model import InvoiceLineItem
+from models.invoices_model import Invoice
+from models.fixed_point import millicents_to_cents
+from models.students_model import Student
+from singleflight import advisory_lock
+from templating import templates
+
+
+# PDFs rendered by the render_invoice_pdf job are written here
+PDF_DIR = os.getenv("PDF_DIR", "generated_pdfs")
+
+
+class IdempotencyKeyConflict(ValueError):
+    """The idempotency key was already used for another student's invoice."""
+
+
+def create_invoice_for_student(db, student_id, by_day=False, idempotency_key=None):
+    """Bills all usage of a student, storing one line item per credit price.
+
+    Usage is aggregated with a single GROUP BY so invoice views and PDFs read
+    the stored line items instead of re-aggregating raw rows on every render.
+    Returns None when the student has no usage data.
+
+    With an idempotency_key, repeating the call returns the invoice created
+    by the first one instead of billing the student again. Raises
+    IdempotencyKeyConflict if the key belongs to another student's invoice.
+    """
+    if idempotency_key:
+        with advisory_lock(f"create-invoice:{idempotency_key}"):
+            existing = _invoice_for_key(db, idempotency_key, student_id)
+            if existing:
+                return existing
+            return _create_invoice(db, student_id, by_day, idempotency_key)
+    return _create_invoice(db, student_id, by_day, None)
+
+
+def _invoice_for_key(db, idempotency_key, student_id):
+    invoice = db.query(Invoice).filter_by(idempotency_key=idempotency_key).first()
+    if invoice is not None and invoice.student_id != student_id:
+        raise IdempotencyKeyConflict(
+            f"Idempotency key '{idempotency_key}' was used for another student"
+        )
+    return invoice
+
+
+def _create_invoice(db, student_id, by_day, idempotency_key):
+    group_by = [InsertedData.credit_price_cents]
+    if by_day:
+        group_by.insert(0, cast(InsertedData.timestamp, Date))
+
+    rows = (
+        db.query(
+            *group_by,
+            func.sum(InsertedData.used_millicredits),
+            # Cast first: the int4 product can overflow, the bigint one cannot
+            func.sum(
+                cast(InsertedData.used_millicredits, BigInteger)
+                * InsertedData.credit_price_cents
+            ),
+            func.min(InsertedData.timestamp),
+            func.max(InsertedData.timestamp),
+        )
+        .filter(InsertedData.student_id == student_id)
+        .group_by(*group_by)
+        .order_by(*group_by)
+        .all()
+    )
+    if not rows:
+        return None
+
+    line_items = []
+    for row in rows:
+        day = row[0] if by_day else None
+        credit_price_cents, used_millicredits, amount_millicents = row[-5:-2]
+        line_items.append(
+            InvoiceLineItem(
+                day=day,
+                credit_price_cents=credit_price_cents,
+                used_millicredits=int(used_millicredits),
+                amount_cents=millicents_to_cents(amount_millicents),
+            )
+        )
+
+    invoice = Invoice(
+        student_id=student_id,
+        period_start=min(row[-2] for row in rows),
+        period_end=max(row[-1] for row in rows),
+        total_cents=sum(item.amount_cents for item in line_items),
+        line_items=line_items,
+        idempotency_key=idempotency_key,
+    )
+    db.add(invoice)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Only reachable without the advisory lock, i.e. outside Postgres
+        db.rollback()
+        return _invoice_for_key(db, idempotency_key, student_id)
+    db.refresh(invoice)
+    return invoice
+
+
+def render_invoice_pdf(db, invoice):
+    """Renders the invoice with the PDF-specific template (no url_for).
+
+    Returns the PDF as bytes. It is rendered on every call, so it always
+    shows the student's current name and address.
+    """
+    student = db.query(Student).filter_by(student_id=invoice.student_id).first()
+    html_content = templates.get_template("view_invoice_pdf.html").render(
+        invoice=invoice, student=student
+    )
+    return HTML(string=html_content, base_url=".").write_pdf()
+
+
+def invoice_pdf_path(invoice_id):
+    return os.path.join(PDF_DIR, f"invoice_{invoice_id}.pdf")
+
+
+def write_invoice_pdf(db, invoice):
+    """Renders the invoice to PDF_DIR, replacing an earlier render. Returns the path."""
+    pdf_path = invoice_pdf_path(invoice.id)
+    os.makedirs(PDF_DIR, exist_ok=True)
+    # Write next to the target and rename, so readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=PDF_DIR, suffix=".pdf.tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(render_invoice_pdf(db, invoice))
+        os.replace(tmp_path, pdf_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return pdf_path
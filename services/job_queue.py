@@ -0,0 +1,113 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+
+from models.jobs_model import Job
+
+
+JOB_KINDS = ("import_csv", "create_invoice", "render_invoice_pdf", "archive_usage")
+
+# A retry waits RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+RETRY_BASE_SECONDS = int(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+# Workers refresh locked_at of their running job this often
+HEARTBEAT_SECONDS = int(os.getenv("JOB_HEARTBEAT_SECONDS", "30"))
+# Running jobs without a heartbeat for this long belong to a crashed worker
+JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", str(HEARTBEAT_SECONDS * 5)))
+
+
+def enqueue(db, kind, payload=None, priority=0, max_attempts=3):
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    job = Job(
+        kind=kind,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=max_attempts,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def claim_job(db, worker_id):
+    """Marks the most urgent runnable job as running and returns it, or None.
+
+    FOR UPDATE SKIP LOCKED lets any number of workers poll the same table
+    without blocking on, or double-claiming, each other's jobs.
+    """
+    job = (
+        db.query(Job)
+        .filter(Job.status == "queued", Job.run_after <= func.now())
+        .order_by(Job.priority.desc(), Job.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        db.rollback()
+        return None
+
+    job.status = "running"
+    job.attempts += 1
+    job.locked_by = worker_id
+    job.locked_at = datetime.now(timezone.utc)
+    db.commit()
+    return job
+
+
+def heartbeat(db, job_id, worker_id):
+    """Refreshes locked_at while the job is still running on this worker."""
+    count = (
+        db.query(Job)
+        .filter(Job.id == job_id, Job.status == "running", Job.locked_by == worker_id)
+        .update({Job.locked_at: datetime.now(timezone.utc)}, synchronize_session=False)
+    )
+    db.commit()
+    return count
+
+
+def complete_job(db, job, result=None):
+    job.status = "done"
+    job.result = result
+    job.last_error = None
+    job.finished_at = datetime.now(timezone.utc)
+    db.commit()
+
+
+def fail_job(db, job, error):
+    job.last_error = error
+    job.locked_by = None
+    if job.attempts < job.max_attempts:
+        delay = RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+        job.status = "queued"
+        job.run_after = datetime.now(timezone.utc) + timedelta(seconds=delay)
+    else:
+        job.status = "failed"
+        job.finished_at = datetime.now(timezone.utc)
+    db.commit()
+
+
+def requeue_stale_jobs(db):
+    """Puts jobs of crashed workers back in the queue. Returns how many.
+
+    A job that has used up its attempts is marked failed instead, so a job
+    that keeps crashing its worker is not retried forever.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=JOB_TIMEOUT_SECONDS)
+    stale = db.query(Job).filter(Job.status == "running", Job.locked_at < cutoff)
+    stale.filter(Job.attempts >= Job.max_attempts).update(
+        {
+            Job.status: "failed",
+            Job.locked_by: None,
+            Job.last_error: "Worker stopped sending heartbeats",
+            Job.finished_at: now,
+        },
+        synchronize_session=False,
+    )
+    count = stale.filter(Job.attempts < Job.max_attempts).update(
+        {Job.status: "queued", Job.locked_by: None}, synchronize_session=False
+    )
+    db.commit()
+    return count
@@ -0,0 +1,73 @@
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from database_main import engine
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller runs fn; callers arriving while it is in flight wait
+    and get the same result (or exception). Results must not be tied to the
+    leader's session, so return plain values rather than ORM objects.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+@contextmanager
+def advisory_lock(key):
+    """Holds a Postgres advisory lock on key, shared by all workers and machines.
+
+    The lock is taken on its own primary connection, so it works the same
+    whichever engine the request's session reads from. Other databases
+    (e.g. SQLite in local experiments) skip the lock.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(hashtextextended(:key, 0))"), {"key": key})
+        try:
+            yield
+        finally:
+            conn.execute(
+                text("SELECT pg_advisory_unlock(hashtextextended(:key, 0))"), {"key": key}
+            )
+            conn.commit()
@@ -0,0 +1,52 @@
+import os
+
+from fastapi.responses import StreamingResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+
+# Compiled templates are cached on disk, so restarts and extra workers skip compiling
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", ".jinja_cache")
+os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+
+# Rendered output is sent once this many characters have accumulated
+STREAM_CHUNK_SIZE = 16 * 1024
+
+env = Environment(
+    loader=FileSystemLoader("templates"),
+    autoescape=True,
+    bytecode_cache=FileSystemBytecodeCache(TEMPLATE_CACHE_DIR),
+)
+
+# The single template environment shared by every router
+templates = Jinja2Templates(env=env)
+
+
+def stream_template(request, name, context, db=None):
+    """Renders a template chunk by chunk as a StreamingResponse.
+
+    Pass ORM queries (ideally with yield_per) in the context instead of lists,
+    so rows are fetched while the page is being sent. The body is generated
+    after the endpoint returns, so `db` is closed here once rendering ends.
+    """
+    template = templates.get_template(name)
+    context = {"request": request, **context}
+
+    def generate():
+        try:
+            buffer = []
+            size = 0
+            for piece in template.generate(context):
+                buffer.append(piece)
+                size += len(piece)
+                if size >= STREAM_CHUNK_SIZE:
+                    yield "".join(buffer).encode("utf-8")
+                    buffer = []
+                    size = 0
+            if buffer:
+                yield "".join(buffer).encode("utf-8")
+        finally:
+            if db is not None:
+                db.close()
+
+    return StreamingResponse(generate(), media_type="text/html")
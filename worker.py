@@ -0,0 +1,162 @@
+import importlib.util
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+from database_main import SessionLocal
+from models.invoices_model import Invoice
+from services.invoice_service import create_invoice_for_student, write_invoice_pdf
+from services.job_queue import (
+    HEARTBEAT_SECONDS,
+    JOB_KINDS,
+    claim_job,
+    complete_job,
+    fail_job,
+    heartbeat,
+    requeue_stale_jobs,
+)
+
+
+POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+GREEN = "\033[92m"
+YELLOW = "\033[93m"
+VIOLET = "\033[95m"
+RESET = "\033[0m"
+
+
+def _load_script(filename):
+    # The CLI scripts have dashes in their names, so they cannot be imported normally
+    spec = importlib.util.spec_from_file_location(
+        filename.replace("-", "_")[:-3], os.path.join(SCRIPT_DIR, filename)
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def handle_import_csv(db, job):
+    payload = job.payload
+    importer = _load_script("import-csv-to-db.py")
+    row_count = importer.import_csv_to_db(
+        payload["csv_path"], payload["student_id"], os.getenv("DATABASE_URL")
+    )
+    return {"rows": row_count}
+
+
+def handle_create_invoice(db, job):
+    payload = job.payload
+    # A retry after a crash between commit and complete_job returns the same invoice
+    invoice = create_invoice_for_student(
+        db,
+        payload["student_id"],
+        by_day=payload.get("by_day", False),
+        idempotency_key=payload.get("idempotency_key") or f"job:{job.id}",
+    )
+    if invoice is None:
+        raise ValueError(f"No data found for student_id {payload['student_id']}")
+    return {"invoice_id": invoice.id, "total_cents": invoice.total_cents}
+
+
+def handle_render_invoice_pdf(db, job):
+    payload = job.payload
+    invoice = db.query(Invoice).get(payload["invoice_id"])
+    if invoice is None:
+        raise ValueError(f"Invoice {payload['invoice_id']} not found")
+    return {"pdf_path": write_invoice_pdf(db, invoice)}
+
+
+def handle_archive_usage(db, job):
+    payload = job.payload
+    archiver = _load_script("archive-usage-data.py")
+    row_count = archiver.archive_usage(
+        os.getenv("DATABASE_URL"),
+        payload.get("older_than_days", archiver.RETENTION_DAYS),
+        payload.get("archive_dir", archiver.ARCHIVE_DIR),
+        payload.get("batch_size", archiver.BATCH_SIZE),
+    )
+    return {"rows": row_count}
+
+
+JOB_HANDLERS = {
+    "import_csv": handle_import_csv,
+    "create_invoice": handle_create_invoice,
+    "render_invoice_pdf": handle_render_invoice_pdf,
+    "archive_usage": handle_archive_usage,
+}
+assert set(JOB_HANDLERS) == set(JOB_KINDS)
+
+
+def _send_heartbeats(job_id, worker_id, stopped):
+    # Own session: the handler's session is busy with the job's transactions
+    db = SessionLocal()
+    try:
+        while not stopped.wait(HEARTBEAT_SECONDS):
+            try:
+                heartbeat(db, job_id, worker_id)
+            except Exception as e:
+                db.rollback()
+                print(f"{YELLOW}⚠️  Heartbeat for job {job_id} failed: {e}{RESET}")
+    finally:
+        db.close()
+
+
+def run_job(db, job):
+    print(f"{VIOLET}⚙️  Running job {job.id} ({job.kind}), attempt {job.attempts}{RESET}")
+    stopped = threading.Event()
+    heartbeats = threading.Thread(
+        target=_send_heartbeats, args=(job.id, job.locked_by, stopped), daemon=True
+    )
+    heartbeats.start()
+    try:
+        result = JOB_HANDLERS[job.kind](db, job)
+    except Exception:
+        db.rollback()
+        fail_job(db, job, traceback.format_exc())
+        print(f"{YELLOW}❌ Job {job.id} failed ({job.status}){RESET}")
+        return
+    finally:
+        stopped.set()
+        heartbeats.join()
+    complete_job(db, job, result)
+    print(f"{GREEN}✅ Job {job.id} done{RESET}")
+
+
+def main():
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"{GREEN}🚀 Worker {worker_id} started{RESET}")
+    while not stopping:
+        db = SessionLocal()
+        try:
+            if requeue_stale_jobs(db):
+                print(f"{YELLOW}⚠️  Requeued stale jobs{RESET}")
+            job = claim_job(db, worker_id)
+            if job is None:
+                time.sleep(POLL_INTERVAL)
+                continue
+            run_job(db, job)
+        except Exception:
+            # e.g. the database restarting; keep polling instead of exiting
+            print(f"{YELLOW}❌ Worker loop error, retrying:\n{traceback.format_exc()}{RESET}")
+            time.sleep(POLL_INTERVAL)
+        finally:
+            # Closing rolls back whatever transaction the error interrupted
+            db.close()
+    print(f"{GREEN}👋 Worker {worker_id} stopped{RESET}")
+
+
+if __name__ == "__main__":
+    main()